@@ -5,13 +5,167 @@ Designed to run in GitHub Actions environment with email notifications
 """
 
 import os
+import atexit
 import json
-import smtplib
+import queue
 import logging
-from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from st_johns_court_checker import StJohnsParkChecker
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from st_johns_court_checker import Slot, StJohnsParkChecker, time_to_minutes
+
+try:
+    import orjson  # Optional: faster JSON encode/decode for the state file
+except ImportError:
+    orjson = None
+
+# Messages sent over one SMTP connection before it is recycled
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+
+# Above this many slots the "All Available Slots" section shows per-day counts only
+MAX_RENDER_SLOTS = 500
+
+
+def _loads(data: bytes):
+    """Decode JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_slot_ids(slot_ids) -> bytes:
+    """Serialize slot ids as a sorted, compact JSON array (deterministic bytes)"""
+    slot_ids = sorted(slot_ids)
+    if orjson is not None:
+        return orjson.dumps(slot_ids)
+    # Compact, unescaped UTF-8 - byte-identical to orjson's output
+    return json.dumps(slot_ids, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=64)
+def _parse_date(date_str: str) -> tuple:
+    """
+    Parse a YYYY-MM-DD date string once and memoize the result.
+    Returns: (weekday, weekday_name) where weekday is 0=Monday .. 6=Sunday
+    """
+    parsed = date.fromisoformat(date_str)
+    return parsed.weekday(), parsed.strftime('%A')
+
+
+def _utc_timestamp() -> str:
+    """Current time formatted for display in emails"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+
+# An available slot with its derived fields computed once per run:
+# id (state file key), minutes since midnight (-1 if unparseable) and is_wk (weekend day)
+TrackedSlot = namedtuple('TrackedSlot', 'date time court id minutes is_wk')
+
+
+@lru_cache(maxsize=32)
+def _court_label(court: str) -> str:
+    """Display label for a court key, e.g. 'court_1' -> 'Court 1'"""
+    return court.replace('_', ' ').title()
+
+
+# Notification subjects indexed by (has weekday slots) + 2 * (has weekend slots)
+_SUBJECTS = (
+    "{n} New Tennis Courts Available (After 5pm) at St Johns Park!",
+    "{n} New Tennis Courts Available (After 5pm) at St Johns Park!",
+    "{n} New Tennis Courts Available (Weekend 9am-10pm) at St Johns Park!",
+    "{n} New Tennis Courts Available at St Johns Park!",
+)
+
+
+# Shared styles for the repeated per-date cards, badges and slot pills, emitted once
+# in <head> so each card/pill only carries a short class attribute
+_EMAIL_STYLE = (
+    ".card{border:1px solid #e6e8eb;border-radius:8px;margin:10px 0;overflow:hidden;}"
+    ".card-head{background:#f8fafc;padding:10px 12px;border-bottom:1px solid #eef2f7;display:flex;align-items:center;justify-content:space-between;}"
+    ".card-date{font-size:14px;color:#101828;font-weight:600;}"
+    ".card-body{padding:10px 12px;}"
+    ".badge{display:inline-block;margin-left:6px;font-size:12px;color:#475467;background:#e6f4ff;border:1px solid #cfe5ff;border-radius:999px;padding:2px 8px;}"
+    ".badge-new{color:#155e2b;background:#dcfce7;border-color:#bbf7d0;}"
+    ".pill{display:inline-block;margin:4px 6px 0 0;padding:6px 10px;border:1px solid #e6e8eb;border-radius:999px;background:#ffffff;font-size:13px;color:#101828;}"
+    ".pill-new{border-color:#86efac;background:#e8f7ee;color:#065f46;}"
+)
+
+BOOKING_URL = "https://tennistowerhamlets.com/book/courts/st-johns-park"
+
+# Plain-text part for emails sent without a text rendering of their own
+_PLAIN_TEXT_FALLBACK = "This notification is best viewed in an HTML email client."
+
+# Slot pill templates (%-formatted with time, court label); new slots get a highlighted variant
+_PILL_TMPL = "<span class='pill'>%s • %s</span>"
+_NEW_PILL_TMPL = "<span class='pill pill-new'>%s • %s</span>"
+
+# Static email scaffolding, filled in with str.format_map when rendering
+_HEADER_TMPL = """
+        <html>
+        <head>
+            <meta charset=\"UTF-8\" />
+            <style>{style}</style>
+        </head>
+        <body style=\"margin:0;padding:24px;background-color:#f5f7fb;font-family:-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif;\">
+          <div style=\"max-width:640px;margin:0 auto;background:#ffffff;border:1px solid #e6e8eb;border-radius:8px;box-shadow:0 2px 6px rgba(16,24,40,.08);overflow:hidden;\">
+            <div style=\"background:#0d6efd;color:#ffffff;padding:16px 20px;\">
+              <h2 style=\"margin:0;font-size:20px;\">St Johns Park Tennis Court Availability</h2>
+              <div style=\"margin-top:4px;font-size:12px;opacity:.95;\">Checked at: {timestamp}</div>
+            </div>
+            <div style=\"padding:20px;\">
+        """
+_FOOTER_HTML = """
+            </div>
+            <div style=\"padding:12px 20px;border-top:1px solid #e6e8eb;background:#fafbfc;color:#667085;font-size:12px;\">
+              Automated check via GitHub Actions
+            </div>
+          </div>
+        </body>
+        </html>
+        """
+_SECTION_TITLE_TMPL = """
+              <h3 style=\"margin:20px 0 8px 0;font-size:16px;color:#101828;\">{title}</h3>
+            """
+_BOOK_NOW_HTML = f"""
+              <p style=\"margin: 18px 0;\">
+                <a href=\"{BOOKING_URL}\" 
+                   style=\"display:inline-block;background-color:#0d6efd;color:#ffffff;padding:10px 16px;text-decoration:none;border-radius:6px;font-weight:600;\">Book Now</a>
+              </p>
+            """
+_NO_NEW_SLOTS_HTML = """
+              <p style=\"margin:0;font-size:14px;color:#475467;\">No new slots since the last check.</p>
+            """
+_TOO_MANY_SLOTS_HTML = """
+              <p style=\"margin:0 0 8px 0;font-size:13px;color:#475467;\">Too many slots to list individually - showing counts per day.</p>
+            """
+
+# Per-date card: header with the date and count badge(s), followed by the slot pills
+_DATE_CARD_OPEN_TMPL = (
+    "<div class='card'>"
+    "<div class='card-head'><div class='card-date'>{date} ({dow})</div>{badges}</div>"
+    "<div class='card-body'>"
+)
+_DATE_CARD_CLOSE = "</div></div>"
+_COUNT_BADGE_TMPL = "<div><span class='badge'>{count} slot{plural}</span></div>"
+_COUNT_NEW_BADGES_TMPL = (
+    "<div>"
+    "<span class='badge'>{count} slot{plural}</span>"
+    "<span class='badge badge-new'>{new_count} new</span>"
+    "</div>"
+)
+
+
+def _count_badge(count: int) -> str:
+    """'N slot(s)' badge for a per-date card header"""
+    return _COUNT_BADGE_TMPL.format_map({'count': count, 'plural': 's' if count != 1 else ''})
+
+
+def _date_card(date_str: str, badges: str, pills: list) -> list:
+    """HTML fragments for one per-date card: header (date and badges) then the slot pills"""
+    header = _DATE_CARD_OPEN_TMPL.format_map({'date': date_str, 'dow': _parse_date(date_str)[1], 'badges': badges})
+    return [header, *pills, _DATE_CARD_CLOSE]
 
 class GitHubCourtMonitor:
     def __init__(self):
@@ -19,29 +173,49 @@ class GitHubCourtMonitor:
         self.state_file = 'notified_slots.json'
         
         # Email configuration from environment variables
-        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
-        self.email_user = os.getenv('EMAIL_USER')
-        self.email_password = os.getenv('EMAIL_PASSWORD')
-        self.notification_email = os.getenv('NOTIFICATION_EMAIL')
+        env = os.environ
+        self.smtp_server = env.get('SMTP_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(env.get('SMTP_PORT', '587'))
+        self.email_user = env.get('EMAIL_USER')
+        self.email_password = env.get('EMAIL_PASSWORD')
+        self.notification_email = env.get('NOTIFICATION_EMAIL')
+        # SMTP connection is opened lazily and reused for every email in this run
+        self._smtp = None
+        self._smtp_sent = 0
+        # Check time of the current run_check, see _utc_timestamp()
+        self._run_timestamp = None
+        # State file mtime and ids as last loaded/saved: repeat loads skip the parse
+        # and an unchanged id set isn't rewritten
+        self._state_mtime = None
+        self._state_cached_set = None
         
-        # Set up logging to file for GitHub Actions artifact
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('court_check.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Set up logging to file for GitHub Actions artifact. Log calls only enqueue the
+        # record; a background QueueListener thread owns the file/console handlers, so
+        # disk writes stay off the check's hot path. The file is size-capped so the
+        # artifact stays small. On CI the log file is the artifact, so skip the console copy.
+        log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handlers = [RotatingFileHandler('court_check.log', maxBytes=1_000_000, backupCount=1, delay=True)]
+        if not env.get('CI'):
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(log_format)
+        self._log_listener = QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        queue_handler = QueueHandler(self._log_listener.queue)
+        # Only merge the message on the calling thread; the listener's handlers add the rest
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        # force=True replaces the console-only config set up by StJohnsParkChecker
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler], force=True)
+        self._log_listener.start()
+        # atexit runs handlers last-in first-out: close SMTP, then drain the log queue
+        atexit.register(self._log_listener.stop)
+        atexit.register(self.close)
         self.logger = logging.getLogger(__name__)
 
     def is_weekend(self, date_str: str) -> bool:
         """Check if a date is Saturday or Sunday"""
         try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            # weekday() returns 0=Monday, 6=Sunday
-            return date_obj.weekday() in [5, 6]  # 5=Saturday, 6=Sunday
+            # weekday is 0=Monday .. 6=Sunday, so 5 and 6 are the weekend
+            return _parse_date(date_str)[0] >= 5
         except Exception:
             return False
 
@@ -55,52 +229,55 @@ class GitHubCourtMonitor:
         else:
             return (17, 24, "Evening (after 5pm)")
 
+    def is_in_time_range(self, slot: TrackedSlot) -> bool:
+        """Check if a slot falls within the time range for its day type (see get_time_range_for_date)"""
+        min_hour, max_hour, _ = self.get_time_range_for_date(slot.date)
+        return min_hour * 60 <= slot.minutes < max_hour * 60
+
     def parse_time_to_hour(self, time_str: str) -> int:
         """
         Extract hour from various time formats (e.g., '18:00', '8pm', '8am')
         Returns hour in 24-hour format, or -1 if parsing fails
         """
-        try:
-            time_lower = time_str.lower().strip()
-
-            if 'pm' in time_lower:
-                # Handle format like '8pm'
-                hour = int(time_lower.replace('pm', '').strip())
-                if hour != 12:  # Convert pm to 24-hour (except 12pm stays 12)
-                    hour += 12
-            elif 'am' in time_lower:
-                # Handle format like '8am'
-                hour = int(time_lower.replace('am', '').strip())
-                if hour == 12:  # Convert 12am to 0
-                    hour = 0
-            else:
-                # Handle format like '18:00'
-                hour = int(time_lower.split(':')[0])
-
-            return hour
-        except (ValueError, IndexError):
-            return -1
+        minutes = time_to_minutes(time_str)
+        return minutes // 60 if minutes >= 0 else -1
+
+    def _to_slot(self, slot: Slot) -> TrackedSlot:
+        """Build a TrackedSlot record from a checker Slot"""
+        return TrackedSlot(
+            # The id joins the (date, time, court) fields, e.g. '2025-09-16_18:00_court_1'
+            *slot, '_'.join(slot), time_to_minutes(slot.time), self.is_weekend(slot.date)
+        )
 
-    def send_notification(self, subject: str, body: str):
-        """Send email notification about court availability"""
+    def send_notification(self, subject: str, body: str, text: str = None):
+        """Send email notification about court availability.
+        body is the HTML part; text is an optional plain-text alternative (see format_availability_text)
+        """
         if not all([self.email_user, self.email_password, self.notification_email]):
             self.logger.warning("Email configuration incomplete - skipping notification")
             return False
+
+        # Imported lazily: most runs never send an email, so skip loading smtplib/ssl/email
+        import smtplib
+        from email.message import EmailMessage
             
         try:
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = self.email_user
             msg['To'] = self.notification_email
             msg['Subject'] = subject
+            msg.set_content(text or _PLAIN_TEXT_FALLBACK)
+            msg.add_alternative(body, subtype='html')
             
-            msg.attach(MIMEText(body, 'html'))
-            
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_user, self.email_password)
-            text = msg.as_string()
-            server.sendmail(self.email_user, self.notification_email, text)
-            server.quit()
+            server = self._get_smtp()
+            try:
+                server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Connection dropped between the health check and the send - reconnect once and retry
+                self._smtp = None
+                server = self._get_smtp()
+                server.send_message(msg)
+            self._smtp_sent += 1
             
             self.logger.info(f"Notification sent successfully to {self.notification_email}")
             return True
@@ -109,39 +286,105 @@ class GitHubCourtMonitor:
             self.logger.error(f"Failed to send notification: {e}")
             return False
     
+    def _get_smtp(self):
+        """Return the cached SMTP connection, (re)opening it if missing, stale or used up"""
+        import smtplib
+
+        if self._smtp is not None:
+            if self._smtp_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                # Recycle long-lived connections before servers start rejecting them
+                self.close()
+            else:
+                try:
+                    if self._smtp.noop()[0] == 250:
+                        return self._smtp
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self.logger.info("Cached SMTP connection is stale - reconnecting")
+                self._smtp = None
+
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        server.ehlo()
+        server.starttls()
+        server.ehlo()
+        server.login(self.email_user, self.email_password)
+        self._smtp = server
+        self._smtp_sent = 0
+        return server
+
+    def close(self):
+        """Close the cached SMTP connection, if one was opened"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception as e:
+            self.logger.debug(f"Error closing SMTP connection: {e}")
+        finally:
+            self._smtp = None
+    
     def load_notified_slots(self):
         """Load previously notified slots from file"""
         try:
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    return set(json.load(f))
+            mtime = os.stat(self.state_file).st_mtime_ns
+            # Unchanged since the last load/save in this process - skip the parse
+            if mtime == self._state_mtime and self._state_cached_set is not None:
+                return set(self._state_cached_set)
+            with open(self.state_file, 'rb') as f:
+                slot_ids = _loads(f.read())
+            self._state_mtime = mtime
+            self._state_cached_set = frozenset(slot_ids)
+            return set(slot_ids)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             self.logger.warning(f"Could not load notified slots: {e}")
         return set()
     
     def save_notified_slots(self, slots):
-        """Save currently notified slots to file"""
+        """Save currently notified slots to file (skipped if unchanged since load)"""
         try:
-            slot_ids = [f"{slot['date']}_{slot['time']}_{slot['court']}" for slot in slots]
-            with open(self.state_file, 'w') as f:
-                json.dump(slot_ids, f)
+            slot_ids = frozenset(slot.id for slot in slots)
+            if slot_ids == self._state_cached_set:
+                self.logger.debug("Notified slots unchanged - skipping state file write")
+                return
+            payload = _dump_slot_ids(slot_ids)
+            # Write to a sibling temp file and rename over the state file, so a
+            # cancelled run can never leave a truncated/empty state behind
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.state_file)
+            self._state_mtime = os.stat(self.state_file).st_mtime_ns
+            self._state_cached_set = slot_ids
         except Exception as e:
             self.logger.error(f"Could not save notified slots: {e}")
     
-    def format_availability_email(self, new_slots, all_filtered_slots, all_slots=None):
+    def format_availability_email(self, new_slots, all_filtered_slots, all_slots, new_ids, timestamp=None):
         """Format court availability as a clean, easy-to-scan HTML email.
+        All slot lists hold TrackedSlot records (see _to_slot).
         all_filtered_slots: filtered slots based on day type (weekday: after 5pm, weekend: 9am-10pm)
         all_slots: all available slots across the day (before and after filtering)
+        new_ids: ids of new_slots, as already computed by run_check (used to mark new rows)
+        timestamp: "checked at" time to show (defaults to the current run's check time)
         """
-        # Precompute ids for marking new rows
-        new_ids = set(f"{s['date']}_{s['time']}_{s['court']}" for s in (new_slots or []))
+        timestamp = timestamp or self._run_timestamp or _utc_timestamp()
+        parts = [_HEADER_TMPL.format_map({'timestamp': timestamp, 'style': _EMAIL_STYLE})]
+
+        # Nothing new to announce - skip grouping and rendering the full week listing
+        if not new_slots:
+            parts.append(_NO_NEW_SLOTS_HTML)
+            parts.append(_FOOTER_HTML)
+            return ''.join(parts)
 
         # Helper to determine section title based on day types in the slots
         def get_section_title(slots, prefix="Available"):
             if not slots:
                 return f"{prefix} Slots"
-            has_weekday = any(not self.is_weekend(s['date']) for s in slots)
-            has_weekend = any(self.is_weekend(s['date']) for s in slots)
+            has_weekday = any(not s.is_wk for s in slots)
+            has_weekend = any(s.is_wk for s in slots)
             if has_weekday and has_weekend:
                 return f"{prefix} Slots"
             elif has_weekend:
@@ -149,197 +392,95 @@ class GitHubCourtMonitor:
             else:
                 return f"{prefix} Slots (Weekday After 5pm)"
 
-        # Helper to get weekday name for a YYYY-MM-DD date string
-        def weekday_name(date_str: str) -> str:
-            try:
-                return datetime.strptime(date_str, '%Y-%m-%d').strftime('%A')
-            except Exception:
-                return ''
-
-        # Helper to create a numeric sort key (minutes since midnight) from various time formats
-        def time_sort_key(t: str) -> int:
-            try:
-                tl = t.strip().lower()
-                is_am = 'am' in tl
-                is_pm = 'pm' in tl
-                tl = tl.replace('am', '').replace('pm', '').strip()
-                hour = 0
-                minute = 0
-                if ':' in tl:
-                    parts = tl.split(':')
-                    hour = int(parts[0])
-                    minute = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
-                else:
-                    hour = int(''.join(ch for ch in tl if ch.isdigit())) if any(ch.isdigit() for ch in tl) else 0
-                if is_pm and hour != 12:
-                    hour += 12
-                if is_am and hour == 12:
-                    hour = 0
-                return hour * 60 + minute
-            except Exception:
-                return 0
-
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
-
-        html = f"""
-        <html>
-        <head>
-            <meta charset=\"UTF-8\" />
-        </head>
-        <body style=\"margin:0;padding:24px;background-color:#f5f7fb;font-family:-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif;\">
-          <div style=\"max-width:640px;margin:0 auto;background:#ffffff;border:1px solid #e6e8eb;border-radius:8px;box-shadow:0 2px 6px rgba(16,24,40,.08);overflow:hidden;\">
-            <div style=\"background:#0d6efd;color:#ffffff;padding:16px 20px;\">
-              <h2 style=\"margin:0;font-size:20px;\">St Johns Park Tennis Court Availability</h2>
-              <div style=\"margin-top:4px;font-size:12px;opacity:.95;\">Checked at: {timestamp}</div>
-            </div>
-            <div style=\"padding:20px;\">
-        """
-
-        if new_slots:
-            new_section_title = get_section_title(new_slots, "New")
-            html += f"""
-              <h3 style=\"margin:20px 0 8px 0;font-size:16px;color:#101828;\">{new_section_title}</h3>
-            """
-            # Group new evening slots by date
-            ns_by_date = {}
-            for s in new_slots:
-                d = s.get('date')
-                if not d:
-                    continue
-                ns_by_date.setdefault(d, []).append(s)
-
-            for d in sorted(ns_by_date.keys()):
-                slots = sorted(ns_by_date[d], key=lambda x: time_sort_key(x.get('time', '0:00')))
-                count = len(slots)
-                dow = weekday_name(d)
-                html += (
-                    f"<div style='border:1px solid #e6e8eb;border-radius:8px;margin:10px 0;overflow:hidden;'>"
-                    f"<div style='background:#f8fafc;padding:10px 12px;border-bottom:1px solid #eef2f7;display:flex;align-items:center;justify-content:space-between;'>"
-                    f"<div style='font-size:14px;color:#101828;font-weight:600;'>{d} ({dow})</div>"
-                    f"<div style='font-size:12px;color:#475467;background:#e6f4ff;border:1px solid #cfe5ff;border-radius:999px;padding:2px 8px;'>"
-                    f"{count} slot{'s' if count != 1 else ''}</div>"
-                    f"</div>"
-                    f"<div style='padding:10px 12px;'>"
-                )
-
-                for s in slots:
-                    court_label = s['court'].replace('_', ' ').title()
-                    html += (
-                        f"<span style='display:inline-block;margin:4px 6px 0 0;padding:6px 10px;border:1px solid #e6e8eb;border-radius:999px;background:#ffffff;font-size:13px;color:#101828;'>"
-                        f"{s['time']} • {court_label}"
-                        f"</span>"
-                    )
-
-                html += "</div></div>"
+        # Group every section by date in a single pass over the widest slot list
+        # (new_slots is a subset of all_filtered_slots, which is a subset of all_slots)
+        filtered_ids = {s.id for s in (all_filtered_slots or [])}
+        by_date = defaultdict(list)
+        es_by_date = defaultdict(list)
+        ns_by_date = defaultdict(list)
+        # Sorting once by (date, time, court) up front means every per-date bucket is
+        # filled in display order, so no per-bucket sort is needed below
+        dated_slots = [s for s in (all_slots or all_filtered_slots or new_slots or []) if s.date]
+        dated_slots.sort(key=lambda s: (s.date, s.minutes, s.court))
+        for s in dated_slots:
+            d = s.date
+            by_date[d].append(s)
+            if s.id in filtered_ids:
+                es_by_date[d].append(s)
+            if s.id in new_ids:
+                ns_by_date[d].append(s)
+
+        new_section_title = get_section_title(new_slots, "New")
+        parts.append(_SECTION_TITLE_TMPL.format_map({'title': new_section_title}))
+        for d, slots in ns_by_date.items():
+            pills = [_PILL_TMPL % (s.time, _court_label(s.court)) for s in slots]
+            parts.extend(_date_card(d, _count_badge(len(slots)), pills))
 
         if all_filtered_slots:
-            all_section_title = get_section_title(all_filtered_slots, "All")
-            html += f"""
-              <h3 style=\"margin:20px 0 8px 0;font-size:16px;color:#101828;\">{all_section_title}</h3>
-            """
-            # Group all filtered slots by date
-            es_by_date = {}
-            for s in all_filtered_slots:
-                d = s.get('date')
-                if not d:
-                    continue
-                es_by_date.setdefault(d, []).append(s)
-
-            for d in sorted(es_by_date.keys()):
-                slots = sorted(es_by_date[d], key=lambda x: time_sort_key(x.get('time', '0:00')))
-                count = len(slots)
-                dow = weekday_name(d)
-                # Count new items for this day
-                new_count = sum(1 for s in slots if f"{s['date']}_{s['time']}_{s['court']}" in new_ids)
-                html += (
-                    f"<div style='border:1px solid #e6e8eb;border-radius:8px;margin:10px 0;overflow:hidden;'>"
-                    f"<div style='background:#f8fafc;padding:10px 12px;border-bottom:1px solid #eef2f7;display:flex;align-items:center;justify-content:space-between;'>"
-                    f"<div style='font-size:14px;color:#101828;font-weight:600;'>{d} ({dow})</div>"
-                    f"<div>"
-                    f"<span style='display:inline-block;margin-left:6px;font-size:12px;color:#475467;background:#e6f4ff;border:1px solid #cfe5ff;border-radius:999px;padding:2px 8px;'>{count} slot{'s' if count != 1 else ''}</span>"
-                    f"<span style='display:inline-block;margin-left:6px;font-size:12px;color:#155e2b;background:#dcfce7;border:1px solid #bbf7d0;border-radius:999px;padding:2px 8px;'>{new_count} new</span>"
-                    f"</div>"
-                    f"</div>"
-                    f"<div style='padding:10px 12px;'>"
-                )
-
-                for s in slots:
-                    sid = f"{s['date']}_{s['time']}_{s['court']}"
-                    is_new = sid in new_ids
-                    court_label = s['court'].replace('_', ' ').title()
-                    pill_bg = '#e8f7ee' if is_new else '#ffffff'
-                    pill_border = '#86efac' if is_new else '#e6e8eb'
-                    pill_color = '#065f46' if is_new else '#101828'
-                    html += (
-                        f"<span style='display:inline-block;margin:4px 6px 0 0;padding:6px 10px;border:1px solid {pill_border};border-radius:999px;background:{pill_bg};font-size:13px;color:{pill_color};'>"
-                        f"{s['time']} • {court_label}"
-                        f"</span>"
+            # On first detection every target-range slot is new and already listed above,
+            # so only repeat the section when it adds older slots
+            if len(all_filtered_slots) > len(new_slots):
+                all_section_title = get_section_title(all_filtered_slots, "All")
+                parts.append(_SECTION_TITLE_TMPL.format_map({'title': all_section_title}))
+                for d, slots in es_by_date.items():
+                    # One membership test per slot picks the pill style and counts new items;
+                    # the header badges are filled in once the day's pills are built
+                    pills = []
+                    new_count = 0
+                    for s in slots:
+                        if s.id in new_ids:
+                            new_count += 1
+                            pills.append(_NEW_PILL_TMPL % (s.time, _court_label(s.court)))
+                        else:
+                            pills.append(_PILL_TMPL % (s.time, _court_label(s.court)))
+                    count = len(slots)
+                    badges = _COUNT_NEW_BADGES_TMPL.format_map(
+                        {'count': count, 'plural': 's' if count != 1 else '', 'new_count': new_count}
                     )
+                    parts.extend(_date_card(d, badges, pills))
 
-                html += "</div></div>"
-
-            html += """
-              <p style=\"margin: 18px 0;\">
-                <a href=\"https://tennistowerhamlets.com/book/courts/st-johns-park\" 
-                   style=\"display:inline-block;background-color:#0d6efd;color:#ffffff;padding:10px 16px;text-decoration:none;border-radius:6px;font-weight:600;\">Book Now</a>
-              </p>
-            """
+            parts.append(_BOOK_NOW_HTML)
 
         if all_slots:
-            html += """
-              <h3 style=\"margin:20px 0 8px 0;font-size:16px;color:#101828;\">All Available Slots</h3>
-            """
-            # Group slots by date
-            by_date = {}
-            for s in all_slots:
-                d = s.get('date')
-                if not d:
-                    continue
-                by_date.setdefault(d, []).append(s)
-
-            for d in sorted(by_date.keys()):
-                slots = sorted(by_date[d], key=lambda x: time_sort_key(x.get('time', '0:00')))
-                count = len(slots)
-                dow = weekday_name(d)
-                html += (
-                    f"<div style='border:1px solid #e6e8eb;border-radius:8px;margin:10px 0;overflow:hidden;'>"
-                    f"<div style='background:#f8fafc;padding:10px 12px;border-bottom:1px solid #eef2f7;display:flex;align-items:center;justify-content:space-between;'>"
-                    f"<div style='font-size:14px;color:#101828;font-weight:600;'>{d} ({dow})</div>"
-                    f"<div style='font-size:12px;color:#475467;background:#e6f4ff;border:1px solid #cfe5ff;border-radius:999px;padding:2px 8px;'>"
-                    f"{count} slot{'s' if count != 1 else ''}</div>"
-                    f"</div>"
-                    f"<div style='padding:10px 12px;'>"
-                )
-
+            parts.append(_SECTION_TITLE_TMPL.format_map({'title': 'All Available Slots'}))
+            # Guard against pathological runs: past the cap only show per-day counts
+            show_pills = len(all_slots) <= MAX_RENDER_SLOTS
+            if not show_pills:
+                parts.append(_TOO_MANY_SLOTS_HTML)
+            for d, slots in by_date.items():
                 # Render each slot as a pill for easy scanning
-                for s in slots:
-                    court_label = s['court'].replace('_', ' ').title()
-                    html += (
-                        f"<span style='display:inline-block;margin:4px 6px 0 0;padding:6px 10px;border:1px solid #e6e8eb;border-radius:999px;background:#ffffff;font-size:13px;color:#101828;'>"
-                        f"{s['time']} • {court_label}"
-                        f"</span>"
-                    )
-
-                html += "</div></div>"
+                pills = [_PILL_TMPL % (s.time, _court_label(s.court)) for s in slots] if show_pills else []
+                parts.extend(_date_card(d, _count_badge(len(slots)), pills))
 
-        html += """
-            </div>
-            <div style=\"padding:12px 20px;border-top:1px solid #e6e8eb;background:#fafbfc;color:#667085;font-size:12px;\">
-              Automated check via GitHub Actions
-            </div>
-          </div>
-        </body>
-        </html>
+        parts.append(_FOOTER_HTML)
+        return ''.join(parts)
+    
+    def format_availability_text(self, new_slots, timestamp=None):
+        """Compact plain-text alternative to format_availability_email: just the new
+        slots, one line per day, and the booking link
         """
-        return html
+        timestamp = timestamp or self._run_timestamp or _utc_timestamp()
+        by_date = defaultdict(list)
+        for s in sorted(new_slots, key=lambda s: (s.date, s.minutes, s.court)):
+            by_date[s.date].append(f"{s.time} {_court_label(s.court)}")
+        lines = [f"New tennis court slots at St Johns Park (checked at {timestamp}):", ""]
+        lines += [f"{d} ({_parse_date(d)[1]}): {', '.join(times)}" for d, times in by_date.items()]
+        lines += ["", f"Book: {BOOKING_URL}"]
+        return '\n'.join(lines)
     
     def run_check(self):
         """Main function to check courts and send notifications"""
         self.logger.info("Starting automated court availability check")
+        # One "checked at" time per run, shared by every email this run sends
+        self._run_timestamp = _utc_timestamp()
         
         try:
-            # Initialize session
-            if not self.checker.initialize_session():
+            # Initialize session, reading the state file on a worker thread meanwhile
+            # (disk vs network I/O, touching disjoint state)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                state_future = executor.submit(self.load_notified_slots)
+                session_ok = self.checker.initialize_session()
+            if not session_ok:
                 self.logger.error("Failed to initialize session")
                 return False
             
@@ -349,68 +490,64 @@ class GitHubCourtMonitor:
             # Log clean summary report
             summary_report = self.checker.format_summary_report(summary)
             self.logger.info(f"Court check completed:\n{summary_report}")
-            
-            # Filter available slots based on day type (weekday: after 5pm, weekend: 9am-10pm)
-            temp_filtered_slots = []
-            if summary['available_slots']:
-                for slot in summary['available_slots']:
-                    slot_date = slot['date']
-                    slot_time = slot['time']
 
-                    # Get time range for this specific date (weekday vs weekend)
-                    min_hour, max_hour, _ = self.get_time_range_for_date(slot_date)
+            # Nothing available at all (the common case) - skip filtering and diffing
+            if not summary.get('available_slots'):
+                self.logger.info("No email sent - no available courts found")
+                # Only touch the state file if it still lists previously notified slots
+                if state_future.result():
+                    self.save_notified_slots([])
+                return True
+            
+            # Convert to TrackedSlot records once so the filtering, diffing and subject
+            # selection below never re-parse dates/times or re-format ids
+            slots = [self._to_slot(slot) for slot in summary['available_slots']]
 
-                    # Parse the hour from the slot time
-                    hour = self.parse_time_to_hour(slot_time)
+            # Filter available slots based on day type (weekday: after 5pm, weekend: 9am-10pm)
+            filtered_slots = [s for s in slots if s.minutes != -1 and self.is_in_time_range(s)]
+            unparsed_times = sorted({s.time for s in slots if s.minutes == -1})
+            if unparsed_times:
+                self.logger.warning("Skipped slots with unrecognised times: %s", ', '.join(unparsed_times))
 
-                    # Check if hour is within the valid range for this day type
-                    if hour != -1 and min_hour <= hour < max_hour:
-                        temp_filtered_slots.append(slot)
-            
             # Log filtered slots summary immediately after main summary
-            if temp_filtered_slots:
+            if filtered_slots:
                 # Group by day type for clearer logging
-                weekday_slots = [s for s in temp_filtered_slots if not self.is_weekend(s['date'])]
-                weekend_slots = [s for s in temp_filtered_slots if self.is_weekend(s['date'])]
+                weekday_slots = [s for s in filtered_slots if not s.is_wk]
+                weekend_slots = [s for s in filtered_slots if s.is_wk]
 
                 if weekday_slots:
                     self.logger.info(f"\nWEEKDAY COURTS AVAILABLE (After 5pm): {len(weekday_slots)} slots")
                     for slot in weekday_slots:
-                        self.logger.info(f"   {slot['date']}: {slot['time']} ({slot['court']})")
+                        self.logger.info("   %s: %s (%s)", slot.date, slot.time, slot.court)
 
                 if weekend_slots:
                     self.logger.info(f"\nWEEKEND COURTS AVAILABLE (9am-10pm): {len(weekend_slots)} slots")
                     for slot in weekend_slots:
-                        self.logger.info(f"   {slot['date']}: {slot['time']} ({slot['court']})")
+                        self.logger.info("   %s: %s (%s)", slot.date, slot.time, slot.court)
             else:
                 self.logger.info(f"\nFILTERED COURTS: None available in target time ranges")
 
-            # Use the already filtered slots
-            filtered_slots = temp_filtered_slots
-            
             # Check for new slots (weekday evening or weekend daytime)
-            previously_notified = self.load_notified_slots()
-            current_slot_ids = set(f"{slot['date']}_{slot['time']}_{slot['court']}" for slot in filtered_slots)
-            new_slot_ids = current_slot_ids - previously_notified
-
-            # Get new slots objects
-            new_filtered_slots = [slot for slot in filtered_slots
-                               if f"{slot['date']}_{slot['time']}_{slot['court']}" in new_slot_ids]
+            previously_notified = state_future.result()
+            new_filtered_slots = [s for s in filtered_slots if s.id not in previously_notified]
+            new_slot_ids = {s.id for s in new_filtered_slots}
+            weekend_count = sum(s.is_wk for s in new_filtered_slots)
+            weekday_count = len(new_filtered_slots) - weekend_count
 
             # Always log new courts section
             if new_filtered_slots:
-                weekday_new = [s for s in new_filtered_slots if not self.is_weekend(s['date'])]
-                weekend_new = [s for s in new_filtered_slots if self.is_weekend(s['date'])]
+                weekday_new = [s for s in new_filtered_slots if not s.is_wk]
+                weekend_new = [s for s in new_filtered_slots if s.is_wk]
 
                 self.logger.info(f"\nNEW COURTS FOUND: {len(new_filtered_slots)} new slots!")
                 if weekday_new:
                     self.logger.info(f"  Weekday (after 5pm): {len(weekday_new)} slots")
                     for slot in weekday_new:
-                        self.logger.info(f"     NEW: {slot['date']}: {slot['time']} ({slot['court']})")
+                        self.logger.info("     NEW: %s: %s (%s)", slot.date, slot.time, slot.court)
                 if weekend_new:
                     self.logger.info(f"  Weekend (9am-10pm): {len(weekend_new)} slots")
                     for slot in weekend_new:
-                        self.logger.info(f"     NEW: {slot['date']}: {slot['time']} ({slot['court']})")
+                        self.logger.info("     NEW: %s: %s (%s)", slot.date, slot.time, slot.court)
             else:
                 self.logger.info(f"\nNEW COURTS: No new slots since last check")
 
@@ -420,26 +557,18 @@ class GitHubCourtMonitor:
             # Only send notification if there are new courts available
             if new_filtered_slots:
                 # Generate dynamic subject based on day types
-                weekday_count = len([s for s in new_filtered_slots if not self.is_weekend(s['date'])])
-                weekend_count = len([s for s in new_filtered_slots if self.is_weekend(s['date'])])
-
-                if weekday_count > 0 and weekend_count > 0:
-                    subject = f"{len(new_filtered_slots)} New Tennis Courts Available at St Johns Park!"
-                elif weekend_count > 0:
-                    subject = f"{len(new_filtered_slots)} New Tennis Courts Available (Weekend 9am-10pm) at St Johns Park!"
-                else:
-                    subject = f"{len(new_filtered_slots)} New Tennis Courts Available (After 5pm) at St Johns Park!"
+                subject_idx = (weekday_count > 0) + 2 * (weekend_count > 0)
+                subject = _SUBJECTS[subject_idx].format(n=len(new_filtered_slots))
 
-                body = self.format_availability_email(new_filtered_slots, filtered_slots, summary.get('available_slots'))
-                self.send_notification(subject, body)
+                body = self.format_availability_email(new_filtered_slots, filtered_slots, slots, new_slot_ids)
+                text = self.format_availability_text(new_filtered_slots)
+                self.send_notification(subject, body, text)
                 self.logger.info(f"Email notification sent for {len(new_filtered_slots)} new courts")
             else:
                 if filtered_slots:
                     self.logger.info(f"No email sent - courts available but no new ones ({len(filtered_slots)} total slots)")
-                elif summary['available_slots']:
-                    self.logger.info(f"No email sent - courts available but none in target time ranges ({len(summary['available_slots'])} total slots)")
                 else:
-                    self.logger.info("No email sent - no available courts found")
+                    self.logger.info(f"No email sent - courts available but none in target time ranges ({len(slots)} total slots)")
                 # Optionally send daily summary (uncomment if you want daily updates)
                 # if datetime.now().hour == 20:  # 8 PM UTC (9 PM UK time)
                 #     subject = "Daily Tennis Court Summary - St Johns Park"
@@ -456,12 +585,14 @@ class GitHubCourtMonitor:
                 error_body = f"""
                 <html><body>
                 <h2>Tennis Court Monitor Error</h2>
-                <p><strong>Time:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+                <p><strong>Time:</strong> {self._run_timestamp or _utc_timestamp()}</p>
                 <p><strong>Error:</strong> {str(e)}</p>
                 </body></html>
                 """
                 self.send_notification(error_subject, error_body)
             return False
+        finally:
+            self.close()
 
 if __name__ == "__main__":
     monitor = GitHubCourtMonitor()
@@ -4,17 +4,60 @@ St Johns Park Tennis Court Availability Checker
 Scrapes the Courtside booking system to check court availability
 """
 
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import time
 from datetime import datetime, timedelta
 import logging
 import json
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+# Matches '18:00', '8pm', '8:30 PM', '8am', ...
+_TIME_RE = re.compile(r'\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*$', re.I)
+
+
+@lru_cache(maxsize=128)
+def time_to_minutes(time_str: str) -> int:
+    """
+    Convert a slot time string to minutes since midnight.
+    Returns -1 if the time cannot be parsed
+    """
+    match = _TIME_RE.match(time_str)
+    if not match:
+        return -1
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = (match.group(3) or '').lower()
+    if meridiem == 'pm' and hour != 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
+class Slot(NamedTuple):
+    """A single court slot; hashable and compared by value"""
+    date: str
+    time: str
+    court: str
+
 
 class StJohnsParkChecker:
     def __init__(self):
         self.session = requests.Session()
+        # Every request goes to the same host, so keep a small pool of kept-alive
+        # connections and let the adapter retry transient connection/5xx failures
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+        )
+        self.session.mount('https://', adapter)
         self.base_url = "https://tennistowerhamlets.com"
         self.booking_url = f"{self.base_url}/book/courts/st-johns-park"
         
@@ -107,7 +150,7 @@ class StJohnsParkChecker:
             # Make request to booking page with timeout
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            self.logger.debug(f"Requesting URL: {url}")
+            self.logger.debug("Requesting URL: %s", url)
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -115,21 +158,24 @@ class StJohnsParkChecker:
             # with open(f'debug_html_{date}.html', 'w', encoding='utf-8') as f:
             #     f.write(soup.prettify())
             
-            # Look for date picker or form elements
-            date_inputs = soup.find_all('input', {'type': 'date'})
-            time_selects = soup.find_all('select', class_=lambda x: x and 'time' in x.lower())
-            
-            self.logger.debug(f"Found {len(date_inputs)} date inputs and {len(time_selects)} time selects")
-            
-            # Check for AJAX endpoints in script tags
-            scripts = soup.find_all('script')
-            ajax_count = 0
-            for script in scripts:
-                if script.string and ('ajax' in script.string.lower() or 'api' in script.string.lower()):
-                    ajax_count += 1
-                    self.logger.debug("Found potential AJAX endpoint in script")
-            
-            self.logger.debug(f"Found {ajax_count} scripts with AJAX/API content")
+            # Page structure diagnostics only feed debug logs, so skip the extra
+            # tree walks unless debug logging is enabled
+            if self.logger.isEnabledFor(logging.DEBUG):
+                # Look for date picker or form elements
+                date_inputs = soup.find_all('input', {'type': 'date'})
+                time_selects = soup.find_all('select', class_=lambda x: x and 'time' in x.lower())
+                
+                self.logger.debug(f"Found {len(date_inputs)} date inputs and {len(time_selects)} time selects")
+                
+                # Check for AJAX endpoints in script tags
+                scripts = soup.find_all('script')
+                ajax_count = 0
+                for script in scripts:
+                    if script.string and ('ajax' in script.string.lower() or 'api' in script.string.lower()):
+                        ajax_count += 1
+                        self.logger.debug("Found potential AJAX endpoint in script")
+                
+                self.logger.debug(f"Found {ajax_count} scripts with AJAX/API content")
             
             # Check if venue is closed
             closed_element = soup.find('p', class_='closed')
@@ -182,7 +228,7 @@ class StJohnsParkChecker:
                     total_booked = sum(len(court['booked_times']) for court in court_data.values())
                     total_sessions = sum(len(court['session_times']) for court in court_data.values())
                     
-                    self.logger.debug(f"Parsed table: {total_available} available, {total_booked} booked, {total_sessions} sessions")
+                    self.logger.debug("Parsed table: %d available, %d booked, %d sessions", total_available, total_booked, total_sessions)
                 else:
                     self.logger.debug("No booking table found in availability div")
             else:
@@ -190,7 +236,7 @@ class StJohnsParkChecker:
             
             availability['status'] = 'open'
             
-            self.logger.debug(f"Checked availability for {date}")
+            self.logger.debug("Checked availability for %s", date)
             
         except requests.RequestException as e:
             self.logger.error(f"Request failed for date {date}: {e}")
@@ -198,6 +244,22 @@ class StJohnsParkChecker:
             
         return availability
     
+    def check_dates_availability(self, dates: List[str], max_workers: int = 4) -> List[Dict]:
+        """
+        Check court availability for several dates concurrently
+        
+        Args:
+            dates: Dates in YYYY-MM-DD format
+            max_workers: Maximum concurrent requests (default: 4, the session pool size)
+        
+        Returns:
+            List of check_court_availability() results, in the same order as dates
+        """
+        # Each page fetch is network-bound, so overlapping them on the shared
+        # session cuts the wall-clock time to roughly the slowest few requests
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.check_court_availability, dates))
+    
     def find_available_slots(self, preferred_times: List[str] = None) -> List[Dict]:
         """
         Find all available slots across the next 7 days
@@ -211,10 +273,7 @@ class StJohnsParkChecker:
         available_slots = []
         dates = self.get_available_dates()
         
-        for date in dates:
-            self.logger.debug(f"Checking availability for {date}")
-            availability = self.check_court_availability(date)
-            
+        for date, availability in zip(dates, self.check_dates_availability(dates)):
             if not availability.get('error') and availability.get('status') != 'closed':
                 for court, times in availability['courts'].items():
                     for time_slot in times['available_times']:
@@ -227,9 +286,6 @@ class StJohnsParkChecker:
                                 'status': 'available'
                             })
             
-            # Be respectful to the server
-            time.sleep(1)
-            
         return available_slots
     
     def get_all_slots_summary(self) -> Dict:
@@ -237,7 +293,7 @@ class StJohnsParkChecker:
         Get a comprehensive summary of all court slots across 7 days
         
         Returns:
-            Dict with summary of available, booked, and session slots
+            Dict with summary of available, booked, and session slots (as Slot tuples)
         """
         summary = {
             'available_slots': [],
@@ -248,10 +304,7 @@ class StJohnsParkChecker:
         
         dates = self.get_available_dates()
         
-        for date in dates:
-            self.logger.debug(f"Getting summary for {date}")
-            availability = self.check_court_availability(date)
-            
+        for date, availability in zip(dates, self.check_dates_availability(dates)):
             if availability.get('error'):
                 continue
                 
@@ -264,19 +317,11 @@ class StJohnsParkChecker:
             
             for court, times in availability['courts'].items():
                 for time_slot in times['available_times']:
-                    summary['available_slots'].append({
-                        'date': date, 'time': time_slot, 'court': court
-                    })
+                    summary['available_slots'].append(Slot(date, time_slot, court))
                 for time_slot in times['booked_times']:
-                    summary['booked_slots'].append({
-                        'date': date, 'time': time_slot, 'court': court
-                    })
+                    summary['booked_slots'].append(Slot(date, time_slot, court))
                 for time_slot in times['session_times']:
-                    summary['session_slots'].append({
-                        'date': date, 'time': time_slot, 'court': court
-                    })
-            
-            time.sleep(1)  # Be respectful to server
+                    summary['session_slots'].append(Slot(date, time_slot, court))
             
         return summary
     
@@ -314,10 +359,10 @@ class StJohnsParkChecker:
             # Group by date
             by_date = {}
             for slot in summary['available_slots']:
-                date = slot['date']
+                date = slot.date
                 if date not in by_date:
                     by_date[date] = []
-                by_date[date].append(f"{slot['time']} ({slot['court']})")
+                by_date[date].append(f"{slot.time} ({slot.court})")
             
             for date in sorted(by_date.keys()):
                 slots = by_date[date]
@@ -330,21 +375,17 @@ class StJohnsParkChecker:
         # Evening availability (after 6pm)
         evening_slots = []
         for slot in summary['available_slots']:
-            try:
-                hour = int(slot['time'].split(':')[0])
-                if hour >= 18:
-                    evening_slots.append(slot)
-            except (ValueError, IndexError):
-                continue
+            if time_to_minutes(slot.time) >= 18 * 60:
+                evening_slots.append(slot)
         
         if evening_slots:
             report.append("🌆 EVENING AVAILABILITY (6PM+):")
             evening_by_date = {}
             for slot in evening_slots:
-                date = slot['date']
+                date = slot.date
                 if date not in evening_by_date:
                     evening_by_date[date] = []
-                evening_by_date[date].append(f"{slot['time']} ({slot['court']})")
+                evening_by_date[date].append(f"{slot.time} ({slot.court})")
             
             for date in sorted(evening_by_date.keys()):
                 slots = evening_by_date[date]
@@ -391,7 +432,7 @@ class StJohnsParkChecker:
                 if available_slots:
                     self.logger.info(f"Found {len(available_slots)} available slots:")
                     for slot in available_slots:
-                        self.logger.info(f"  {slot['date']} at {slot['time']} - {slot['court']}")
+                        self.logger.info("  %s at %s - %s", slot['date'], slot['time'], slot['court'])
                 else:
                     self.logger.info("No available slots found")
                 